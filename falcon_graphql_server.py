@@ -2,7 +2,11 @@
 # coding: utf-8
 #
 # To run:
-# $ gunicorn graphene_server:graphQL_api -b localhost:4004
+# $ gunicorn -c server_config.py falcon_graphql_server:graphQL_api
+#
+# The app is plain WSGI: graphene 1.x executes queries synchronously and the
+# resolvers do no I/O, so async handlers under an ASGI server would only add
+# event loop overhead. Concurrency comes from gunicorn's threaded workers.
 #
 # To use, POST as application/json with query, variables, & operationName args:
 # $ curl -H 'Content-Type: application/json' \
@@ -12,14 +16,31 @@
 # You can also use the GraphiQL dashboard:
 # $ open "http://localhost:4004/graphiql"
 
-from collections import OrderedDict
-from contextlib import redirect_stdout
-import json
-from os import devnull
-from random import randrange
+import os
+from random import choices
+from threading import Lock
 
 import falcon
 import graphene
+from graphql import Source, execute, parse, print_ast, validate
+from graphql.execution import ExecutionResult
+from graphql.execution.executors.sync import SyncExecutor
+from graphql.language import ast
+import orjson
+
+
+# Precomputed response bodies for fixed error messages
+ERR_NO_QUERY = b'{"errors":[{"message":"Must provide query string."}]}'
+ERR_BAD_VARS = b'{"errors":[{"message":"Variables are invalid JSON."}]}'
+ERR_BAD_BODY = b'{"errors":[{"message":"POST body sent invalid JSON."}]}'
+ERR_METHOD = (b'{"errors":[{"message":'
+              b'"GraphQL only supports GET and POST requests."}]}')
+ERR_QUERY_TOO_LARGE = (b'{"errors":[{"message":'
+                       b'"Query is too large or too deeply nested."}]}')
+
+# Limits on queries accepted for parsing (guards against CPU exhaustion)
+MAX_QUERY_LENGTH = 16 * 1024
+MAX_QUERY_DEPTH = 20
 
 
 # Define a GraphQL query schema
@@ -41,13 +62,407 @@ class Query(graphene.ObjectType):
         return 'Extra!'
 
     def resolve_roll_dice(self, args, context, info):
-        num_dice = range(args.get('dice'))
-        return [randrange(1, args.get('sides', 6) + 1) for i in num_dice]
+        faces = range(1, args.get('sides', 6) + 1)
+        return choices(faces, k=args.get('dice'))
 
 
 # Create the schema that will be used to resolve GraphQL requests.
 schema = graphene.Schema(query=Query)
 
+# Resolvers run inline, so a single executor can be shared by every request
+query_executor = SyncExecutor()
+
+
+class LRUCache:
+    "A thread-safe mapping that evicts its least recently used entries."
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = {}
+        self.lock = Lock()
+
+    def get(self, key):
+        "Returns the value for key (marking it recently used) or None."
+        with self.lock:
+            value = self.entries.pop(key, None)
+            if value is not None:
+                self.entries[key] = value
+        return value
+
+    def set(self, key, value):
+        "Stores a value, evicting the least recently used one when full."
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                del self.entries[next(iter(self.entries))]
+
+    def items(self):
+        "Returns a snapshot of the entries, least recently used first."
+        with self.lock:
+            return list(self.entries.items())
+
+
+# Fields whose results must never be served from the response cache
+UNCACHEABLE_FIELDS = frozenset(['rollDice'])
+
+# Cache serialized responses to repeat queries (turn off once resolvers
+# stop being pure, e.g. when they read data that can change)
+CACHE_RESPONSES = True
+response_cache = LRUCache(1024)
+
+# Validation results, keyed by the document's structure instead of its text
+validation_cache = LRUCache(1024)
+
+
+def validate_document(document):
+    """Validates a document against the schema.
+
+    Validation depends only on the document (the schema and rules are
+    constant), so queries differing only in whitespace, commas or comments
+    reuse the errors found for the first one.
+    """
+    key = print_ast(document)
+    errors = validation_cache.get(key)
+    if errors is None:
+        errors = validate(schema, document)
+        validation_cache.set(key, errors)
+    return errors
+
+
+# Bounded so that adversarial query strings cannot grow the cache forever
+PARSE_CACHE_SIZE = 1024
+parse_cache = LRUCache(PARSE_CACHE_SIZE)
+
+# Optionally persist parsed queries to a file so new processes start warm
+# (e.g. FALCON_GQL_PERSIST_CACHE=/var/cache/falcon-graphql/queries.json)
+PERSIST_CACHE_PATH = os.environ.get('FALCON_GQL_PERSIST_CACHE')
+
+
+def parse_and_validate(query):
+    """Parses and validates a query string against the schema.
+
+    Returns a (document, errors) tuple. The result only depends on the query
+    string (the schema is constant), so repeat queries skip both steps as
+    long as the document is run with graphql.execute (see execute_query);
+    schema.execute would validate it all over again.
+    """
+    result = parse_cache.get(query)
+    if result is None:
+        try:
+            document = parse(Source(query, 'GraphQL request'))
+        except Exception as e:
+            # e.g. syntax errors, or a RecursionError from deeply nested
+            # values; like graphql() does, these are reported as errors
+            result = None, [e]
+        else:
+            result = document, validate_document(document)
+        parse_cache.set(query, result)
+    return result
+
+
+def save_persisted_queries():
+    """Writes the valid queries in the parse cache to the persisted file.
+
+    The file only ever holds one parse cache's worth of queries, and it's
+    replaced atomically so that other processes never read it half written.
+    Meant to be called as a process exits (see worker_exit in server_config).
+    """
+    if not PERSIST_CACHE_PATH:
+        return
+
+    queries = [query for query, (document, errors) in parse_cache.items()
+               if not errors]
+    temp_path = '{}.{}.tmp'.format(PERSIST_CACHE_PATH, os.getpid())
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(orjson.dumps(queries))
+        os.replace(temp_path, PERSIST_CACHE_PATH)
+    except OSError:
+        # persisting is best effort, the server works fine without it
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def load_persisted_queries():
+    "Warms the parse and validation caches from the persisted query file."
+    try:
+        with open(PERSIST_CACHE_PATH, 'rb') as f:
+            queries = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        # a missing or unreadable file just means starting with cold caches
+        return
+    if not isinstance(queries, list):
+        return
+
+    for query in queries[-PARSE_CACHE_SIZE:]:
+        if isinstance(query, str):
+            parse_and_validate(query)
+
+
+# With gunicorn's preload the master warms the caches once for every worker,
+# otherwise each worker warms its own
+if PERSIST_CACHE_PATH:
+    load_persisted_queries()
+
+
+def execute_query(query, variables, operation_name=None):
+    """Runs a query string against the schema, reusing cached documents.
+
+    The cached document is already validated, so it's executed directly
+    with graphql.execute rather than through schema.execute (graphene 1.x's
+    graphql() wrapper), which validates every document it's given.
+    """
+    document, errors = parse_and_validate(query)
+    if errors:
+        return ExecutionResult(errors=errors, invalid=True)
+    try:
+        return execute(schema, document, variable_values=variables,
+                       operation_name=operation_name, executor=query_executor)
+    except Exception as e:
+        # report errors raised outside of resolvers (e.g. unknown operations
+        # or bad variables) the same way schema.execute does
+        return ExecutionResult(errors=[e], invalid=True)
+
+
+def selected_fields(selection_set):
+    "Yields the name of every field selected within a selection set."
+    for selection in selection_set.selections:
+        if isinstance(selection, ast.Field):
+            yield selection.name.value
+        if getattr(selection, 'selection_set', None) is not None:
+            yield from selected_fields(selection.selection_set)
+
+
+def is_cacheable(document):
+    "Checks that a document only reads fields that are safe to cache."
+    for definition in document.definitions:
+        if (isinstance(definition, ast.OperationDefinition) and
+                definition.operation != 'query'):
+            return False
+        if not UNCACHEABLE_FIELDS.isdisjoint(
+                selected_fields(definition.selection_set)):
+            return False
+    return True
+
+
+# Whether the response to each query may be cached, decided once per query
+cacheable_queries = LRUCache(PARSE_CACHE_SIZE)
+
+
+def is_query_cacheable(query):
+    "Checks that a query is valid and only reads fields that can be cached."
+    cacheable = cacheable_queries.get(query)
+    if cacheable is None:
+        document, errors = parse_and_validate(query)
+        cacheable = not errors and is_cacheable(document)
+        cacheable_queries.set(query, cacheable)
+    return cacheable
+
+
+def declared_variables(document, operation_name):
+    """Lists the variables declared by the operation a request executes.
+
+    Returns None when the request doesn't select exactly one operation.
+    """
+    operations = [definition for definition in document.definitions
+                  if isinstance(definition, ast.OperationDefinition) and
+                  (not operation_name or (definition.name and
+                                          definition.name.value ==
+                                          operation_name))]
+    if len(operations) != 1:
+        return None
+    return [definition.variable.name.value
+            for definition in operations[0].variable_definitions or []]
+
+
+# Largest canonical variables a response cache key may embed
+MAX_CACHED_VARIABLES_BYTES = 1024
+
+
+def response_cache_key(query, variables, operation_name):
+    """Builds a response cache key, canonicalizing the variables.
+
+    Returns None when the response to the request can't be cached.
+    """
+    if not is_query_cacheable(query):
+        return None
+    names = declared_variables(parse_and_validate(query)[0], operation_name)
+    if names is None or not isinstance(variables or {}, dict):
+        return None
+    # variables the operation never declares can't change the response
+    variables = {name: variables[name] for name in names
+                 if name in (variables or {})}
+    try:
+        variables = orjson.dumps(variables, option=orjson.OPT_SORT_KEYS)
+    except orjson.JSONEncodeError:
+        # e.g. variables nested deeper than orjson can encode
+        return None
+    if len(variables) > MAX_CACHED_VARIABLES_BYTES:
+        return None
+    return query, variables, operation_name
+
+
+def is_query_too_large(query):
+    "Checks a query against the length and nesting depth limits."
+    if len(query) > MAX_QUERY_LENGTH:
+        return True
+    # a query can't nest deeper than its number of braces and brackets
+    if query.count('{') + query.count('[') <= MAX_QUERY_DEPTH:
+        return False
+    depth = 0
+    for char in query:
+        if char in '{[':
+            depth += 1
+            if depth > MAX_QUERY_DEPTH:
+                return True
+        elif char in '}]':
+            depth -= 1
+    return False
+
+
+def respond_to_query(resp, query, variables, operation_name):
+    "Executes a query and writes the result (or its errors) to the response."
+    if is_query_too_large(query):
+        resp.status = falcon.HTTP_413
+        resp.data = ERR_QUERY_TOO_LARGE
+        return
+
+    key = None
+    if CACHE_RESPONSES:
+        key = response_cache_key(query, variables, operation_name)
+    if key is not None:
+        body = response_cache.get(key)
+        if body is not None:
+            resp.status = falcon.HTTP_200
+            resp.data = body
+            return
+
+    # run the query
+    result = execute_query(query, variables, operation_name)
+
+    # construct the response (wrapping the serialized result) and return it
+    if result.data:
+        resp.status = falcon.HTTP_200
+        resp.data = b'{"data":' + orjson.dumps(result.data) + b'}'
+        if key is not None and not result.errors:
+            response_cache.set(key, resp.data)
+        return
+    elif result.errors:
+        # NOTE: these errors don't include the optional 'locations' key
+        err_msgs = [{'message': str(i)} for i in result.errors]
+        resp.status = falcon.HTTP_400
+        resp.data = b'{"errors":' + orjson.dumps(err_msgs) + b'}'
+        return
+    else:
+        # responses should always have either data or errors
+        raise
+
+
+def extract_params(req, resp):
+    """Reads the query, variables and operationName from url parameters.
+
+    Returns a (query, variables, operation_name, stop) tuple. When stop is
+    True an error response was already written and the request is finished.
+    Parameters that weren't provided are returned as None.
+    """
+    query = req.get_param('query') or None
+    operation_name = req.get_param('operationName') or None
+
+    variables = req.get_param('variables') or None
+    if variables is not None:
+        try:
+            variables = orjson.loads(variables)
+        except orjson.JSONDecodeError:
+            resp.status = falcon.HTTP_400
+            resp.data = ERR_BAD_VARS
+            return None, None, None, True
+
+    return query, variables, operation_name, False
+
+
+def extract_json_body(req, resp, query, variables, operation_name):
+    "Fills in parameters missing from the url with an application/json body."
+    # error for requests with no content
+    if req.content_length in (None, 0):
+        resp.status = falcon.HTTP_400
+        resp.data = ERR_BAD_BODY
+        return None, None, None, True
+
+    # read and decode request body
+    try:
+        req.context['post_data'] = orjson.loads(req.stream.read())
+    except orjson.JSONDecodeError:
+        resp.status = falcon.HTTP_400
+        resp.data = ERR_BAD_BODY
+        return None, None, None, True
+
+    post_data = req.context['post_data']
+    if not isinstance(post_data, dict):
+        # there's nothing to read from bodies that aren't JSON objects
+        return query, variables, operation_name, False
+
+    # build the query string (Graph Query Language string)
+    if query is None and post_data.get('query'):
+        query = str(post_data['query'])
+
+    # build the variables (JSON object, or JSON string of key/values)
+    if variables is None and post_data.get('variables'):
+        variables = post_data['variables']
+        # objects were already decoded along with the rest of the body
+        if isinstance(variables, str):
+            try:
+                variables = orjson.loads(variables)
+            except orjson.JSONDecodeError:
+                resp.status = falcon.HTTP_400
+                resp.data = ERR_BAD_VARS
+                return None, None, None, True
+
+    # build the operationName string (matches a query or mutation name)
+    if operation_name is None and post_data.get('operationName'):
+        operation_name = str(post_data['operationName'])
+
+    return query, variables, operation_name, False
+
+
+def extract_graphql_body(req, resp, query, variables, operation_name):
+    "Fills in a query missing from the url with an application/graphql body."
+    # read and decode request body
+    req.context['post_data'] = req.stream.read().decode('utf-8')
+
+    # build the query string
+    if query is None and req.context['post_data']:
+        query = req.context['post_data']
+
+    return query, variables, operation_name, False
+
+
+def media_type(req):
+    "Returns the request's content type, lowercased and without parameters."
+    content_type = req.content_type or ''
+    return content_type.split(';', 1)[0].strip().lower()
+
+
+# POST body parsers for each content type that can carry GraphQL parameters
+POST_BODY_EXTRACTORS = {
+    'application/json': extract_json_body,
+    'application/graphql': extract_graphql_body,
+}
+
+
+def extract_body(req, resp, query, variables, operation_name):
+    """Fills in parameters missing from the url with the POST body.
+
+    Takes and returns the same tuple as extract_params().
+    """
+    extractor = POST_BODY_EXTRACTORS.get(media_type(req))
+    if extractor is None:
+        # Skip application/x-www-form-urlencoded since they are automatically
+        # included by setting req_options.auto_parse_form_urlencoded = True
+        return query, variables, operation_name, False
+    return extractor(req, resp, query, variables, operation_name)
+
 
 def set_graphql_allow_header(req, resp, resource):
     "Sets the 'Allow' header on responses to GraphQL requests."
@@ -84,61 +499,18 @@ class GraphQLResource:
 
         """
 
-        if req.params and 'query' in req.params and req.params['query']:
-            query = str(req.params['query'])
-        else:
+        # check for the query first, a missing one is the error to report
+        if not req.get_param('query'):
             # this means that there aren't any query params in the url
             resp.status = falcon.HTTP_400
-            resp.body = json.dumps(
-                {"errors": [{"message": "Must provide query string."}]},
-                separators=(',', ':')
-            )
+            resp.data = ERR_NO_QUERY
             return
 
-        if 'variables' in req.params and req.params['variables']:
-            try:
-                variables = json.loads(str(req.params['variables']),
-                                       object_pairs_hook=OrderedDict)
-            except json.decoder.JSONDecodeError:
-                resp.status = falcon.HTTP_400
-                resp.body = json.dumps(
-                    {"errors": [{"message": "Variables are invalid JSON."}]},
-                    separators=(',', ':')
-                )
-                return
-        else:
-            variables = ""
-
-        if 'operationName' in req.params and req.params['operationName']:
-            operation_name = str(req.params['operationName'])
-        else:
-            operation_name = None
-
-        # redirect stdout of schema.execute to /dev/null
-        with open(devnull, 'w') as f:
-            with redirect_stdout(f):
-                # run the query
-                if operation_name is None:
-                    result = schema.execute(query, variable_values=variables)
-                else:
-                    result = schema.execute(query, variable_values=variables,
-                                            operation_name=operation_name)
-
-        # construct the response and return the result
-        if result.data:
-            data_ret = {'data': result.data}
-            resp.status = falcon.HTTP_200
-            resp.body = json.dumps(data_ret, separators=(',', ':'))
+        query, variables, operation_name, stop = extract_params(req, resp)
+        if stop:
             return
-        elif result.errors:
-            # NOTE: these errors don't include the optional 'locations' key
-            err_msgs = [{'message': str(i)} for i in result.errors]
-            resp.status = falcon.HTTP_400
-            resp.body = json.dumps({'errors': err_msgs}, separators=(',', ':'))
-            return
-        else:
-            # responses should always have either data or errors
-            raise
+
+        respond_to_query(resp, query, variables, operation_name)
 
     def on_post(self, req, resp):
         """Handles GraphQL POST requests.
@@ -188,197 +560,76 @@ class GraphQLResource:
 
         """
 
-        # parse url parameters in the request first
-        if req.params and 'query' in req.params and req.params['query']:
-            query = str(req.params['query'])
-        else:
-            query = None
-
-        if 'variables' in req.params and req.params['variables']:
-            try:
-                variables = json.loads(str(req.params['variables']),
-                                       object_pairs_hook=OrderedDict)
-            except json.decoder.JSONDecodeError:
-                resp.status = falcon.HTTP_400
-                resp.body = json.dumps(
-                    {"errors": [{"message": "Variables are invalid JSON."}]},
-                    separators=(',', ':')
-                )
-                return
-        else:
-            variables = None
-
-        if 'operationName' in req.params and req.params['operationName']:
-            operation_name = str(req.params['operationName'])
-        else:
-            operation_name = None
-
-        # Next, handle 'content-type: application/json' requests
-        if req.content_type and 'application/json' in req.content_type:
-            # error for requests with no content
-            if req.content_length in (None, 0):
-                resp.status = falcon.HTTP_400
-                resp.body = json.dumps(
-                    {"errors": [{"message": "POST body sent invalid JSON."}]},
-                    separators=(',', ':')
-                )
-                return
-
-            # read and decode request body
-            raw_json = req.stream.read()
-            try:
-                req.context['post_data'] = json.loads(
-                                               raw_json.decode('utf-8'),
-                                               object_pairs_hook=OrderedDict
-                                           )
-            except json.decoder.JSONDecodeError:
-                resp.status = falcon.HTTP_400
-                resp.body = json.dumps(
-                    {"errors": [{"message": "POST body sent invalid JSON."}]},
-                    separators=(',', ':')
-                )
-                return
-
-            # build the query string (Graph Query Language string)
-            if (query is None and req.context['post_data'] and
-                    'query' in req.context['post_data']):
-                query = str(req.context['post_data']['query'])
-            elif query is None:
-                resp.status = falcon.HTTP_400
-                resp.body = json.dumps(
-                    {"errors": [{"message": "Must provide query string."}]},
-                    separators=(',', ':')
-                )
-                return
-
-            # build the variables string (JSON string of key/value pairs)
-            if (variables is None and req.context['post_data'] and
-                    'variables' in req.context['post_data'] and
-                    req.context['post_data']['variables']):
-                variables = str(req.context['post_data']['variables'])
-                try:
-                    json_str = str(req.context['post_data']['variables'])
-                    variables = json.loads(json_str,
-                                           object_pairs_hook=OrderedDict)
-                except json.decoder.JSONDecodeError:
-                    resp.status = falcon.HTTP_400
-                    resp.body = json.dumps(
-                        {"errors": [
-                            {"message": "Variables are invalid JSON."}
-                        ]},
-                        separators=(',', ':')
-                    )
-                    return
-            elif variables is None:
-                variables = ""
-
-            # build the operationName string (matches a query or mutation name)
-            if (operation_name is None and
-                    'operationName' in req.context['post_data'] and
-                    req.context['post_data']['operationName']):
-                operation_name = str(req.context['post_data']['operationName'])
-
-        # Alternately, handle 'content-type: application/graphql' requests
-        elif req.content_type and 'application/graphql' in req.content_type:
-            # read and decode request body
-            req.context['post_data'] = req.stream.read().decode('utf-8')
-
-            # build the query string
-            if query is None and req.context['post_data']:
-                query = str(req.context['post_data'])
-
-            elif query is None:
-                resp.status = falcon.HTTP_400
-                resp.body = json.dumps(
-                    {"errors": [{"message": "Must provide query string."}]},
-                    separators=(',', ':')
-                )
-                return
-
-        # Skip application/x-www-form-urlencoded since they are automatically
-        # included by setting req_options.auto_parse_form_urlencoded = True
-
-        elif query is None:
-            # this means that the content-type is wrong and there aren't any
-            # query params in the url
-            resp.status = falcon.HTTP_400
-            resp.body = json.dumps(
-                {"errors": [{"message": "Must provide query string."}]},
-                separators=(',', ':')
-            )
+        # parse url parameters in the request first, then the body
+        query, variables, operation_name, stop = extract_params(req, resp)
+        if stop:
             return
 
-        # redirect stdout of schema.execute to /dev/null
-        with open(devnull, 'w') as f:
-            with redirect_stdout(f):
-                # run the query
-                if operation_name is None:
-                    result = schema.execute(query, variable_values=variables)
-                else:
-                    result = schema.execute(query, variable_values=variables,
-                                            operation_name=operation_name)
-
-        # construct the response and return the result
-        if result.data:
-            data_ret = {'data': result.data}
-            resp.status = falcon.HTTP_200
-            resp.body = json.dumps(data_ret, separators=(',', ':'))
+        query, variables, operation_name, stop = extract_body(
+            req, resp, query, variables, operation_name)
+        if stop:
             return
-        elif result.errors:
-            # NOTE: these errors don't include the optional 'locations' key
-            err_msgs = [{'message': str(i)} for i in result.errors]
+
+        if query is None:
+            # this means that neither the url nor the body provided a query
             resp.status = falcon.HTTP_400
-            resp.body = json.dumps({'errors': err_msgs}, separators=(',', ':'))
+            resp.data = ERR_NO_QUERY
             return
-        else:
-            # responses should always have either data or errors
-            raise
+
+        respond_to_query(resp, query, variables, operation_name)
 
     def on_put(self, req, resp):
         "Handles PUT requests."
         resp.status = falcon.HTTP_405
-        resp.body = json.dumps(
-            {"errors": [
-                {"message": "GraphQL only supports GET and POST requests."}
-            ]},
-            separators=(',', ':')
-        )
+        resp.data = ERR_METHOD
 
     def on_patch(self, req, resp):
         "Handles PATCH requests."
         resp.status = falcon.HTTP_405
-        resp.body = json.dumps(
-            {"errors": [
-                {"message": "GraphQL only supports GET and POST requests."}
-            ]},
-            separators=(',', ':')
-        )
+        resp.data = ERR_METHOD
 
     def on_delete(self, req, resp):
         "Handles DELETE requests."
         resp.status = falcon.HTTP_405
-        resp.body = json.dumps(
-            {"errors": [
-                {"message": "GraphQL only supports GET and POST requests."}
-            ]},
-            separators=(',', ':')
-        )
+        resp.data = ERR_METHOD
+
+
+# Directory containing the GraphiQL dashboard's static files
+GRAPHIQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'graphiql')
+
+
+def read_graphiql_file(static_file):
+    "Reads a GraphiQL static file into memory."
+    with open(os.path.join(GRAPHIQL_DIR, static_file), 'rb') as f:
+        return f.read()
+
+
+# Content types of the files making up the dashboard (anything else is a 404)
+GRAPHIQL_CONTENT_TYPES = {
+    'graphiql.html': 'text/html; charset=UTF-8',
+    'graphiql.css': 'text/css; charset=UTF-8',
+    'graphiql.min.js': 'application/javascript; charset=UTF-8',
+}
+
+# The dashboard doesn't change while the server runs, so load it only once
+GRAPHIQL_FILES = {
+    static_file: (read_graphiql_file(static_file), content_type)
+    for static_file, content_type in GRAPHIQL_CONTENT_TYPES.items()
+}
 
 
 class StaticGraphiQLResource:
     "Serves GraphiQL dashboard. Meant to be used during development only."
     def on_get(self, req, resp, static_file=None):
         "Handles GraphiQL GET requests."
-        if static_file is None:
-            static_file = 'graphiql.html'
-            resp.content_type = 'text/html; charset=UTF-8'
-        elif static_file == 'graphiql.css':
-            resp.content_type = 'text/css; charset=UTF-8'
-        else:
-            resp.content_type = 'application/javascript; charset=UTF-8'
+        graphiql_file = GRAPHIQL_FILES.get(static_file or 'graphiql.html')
+        if graphiql_file is None:
+            resp.status = falcon.HTTP_404
+            return
 
         resp.status = falcon.HTTP_200
-        resp.stream = open('graphiql/' + static_file, 'rb')
+        resp.data, resp.content_type = graphiql_file
 
 
 # Load the API object
@@ -390,6 +641,9 @@ graphQL_api.req_options.keep_blank_qs_values = True
 # Automatically parse a www-form-urlencoded POST body & insert into req.params
 graphQL_api.req_options.auto_parse_form_urlencoded = True
 
+# Keep commas in query params (e.g. in variables) instead of splitting on them
+graphQL_api.req_options.auto_parse_qs_csv = False
+
 # Connect routes to resources
 graphQL_route = GraphQLResource()
 
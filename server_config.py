@@ -16,8 +16,8 @@ workers = 2
 # set threads (optimize for cores * 2-4?)
 threads = 2
 
-# set worker class ('sync' is good for normal workloads)
-worker_class = 'sync'
+# set worker class ('gthread' lets each worker overlap requests on its threads)
+worker_class = 'gthread'
 
 # set maximum number of simultaneous client connections per worker process
 worker_connections = 4096
@@ -64,3 +64,9 @@ access_log_file = None
 
 # set process name
 proc_name = 'falcon-graphql-gunicorn'
+
+
+# save parsed queries as workers exit (if FALCON_GQL_PERSIST_CACHE is set)
+def worker_exit(server, worker):
+    from falcon_graphql_server import save_persisted_queries
+    save_persisted_queries()